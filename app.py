@@ -1,41 +1,69 @@
 # app.py
 import streamlit as st          # Streamlit: easy web apps in Python
-import pandas as pd             # pandas: table (CSV) handling
 import numpy as np              # numpy: math functions
-import glob, os                 # glob & os: find files in folders
-from PIL import Image
+import os                       # os: find files in folders
+import re                       # re: fast age-string parsing
+import types                    # types: read-only mapping for constants
+import base64                   # base64: inline organ PNGs as data URIs
+from math import sqrt           # math.sqrt: scalar sqrt without numpy dispatch
 
-# 1) Load every CSV in your data/ folder into a dict of DataFrames
-@st.cache_data
+# 1) Load the precomputed binary bundle data/norms.npz (built offline by
+#    build_norms.py from the CSVs) into a dict of per-organ column arrays.
+#    cache_resource: the tables are read-only, so skip cache_data's
+#    per-rerun copy/hash of the return value
+# Pediatric ages fit in 0..240 months, so an age→row lookup table this
+# long covers every query with a single integer index
+_LUT_MAX_MONTHS = 240
+
+# Unit → scale-factor tables: one dict lookup and multiply per conversion
+# instead of branching on the unit each time
+_TO_MM   = {"cm": 10.0, "mm": 1.0}
+_H_SCALE = {"cm": 1.0, "m": 100.0}   # height → cm
+_W_SCALE = {"kg": 1.0, "g": 0.001}   # weight → kg
+
+@st.cache_resource
 def load_normative_tables():
-    data_dir = os.path.join(os.path.dirname(__file__), "data")
-    csv_files = glob.glob(os.path.join(data_dir, "*.csv"))
+    path = os.path.join(os.path.dirname(__file__), "data", "norms.npz")
+    data = np.load(path)
     tables = {}
-    for path in csv_files:
-        name = os.path.splitext(os.path.basename(path))[0]
-        # e.g. "right_kidney_length" → DataFrame from that CSV
-        tables[name] = pd.read_csv(path)
+    for key in data.files:
+        # e.g. "right_kidney_length__mean_mm" → tables["right_kidney_length"]["mean_mm"]
+        # float32 halves the footprint vs float64; the source data is
+        # 0.1 mm precision, so z-scores are unaffected
+        name, col = key.rsplit("__", 1)
+        tables.setdefault(name, {})[col] = data[key].astype(np.float32, copy=False)
+    # Precompute the month → row-index LUT per organ (same bracket choice
+    # as a binary search on age_min, evaluated once here instead of per click)
+    months = np.arange(_LUT_MAX_MONTHS + 1)
+    for cols in tables.values():
+        amin = cols["age_min_months"]
+        lut = np.searchsorted(amin, months, side="right").astype(np.int32) - 1
+        np.clip(lut, 0, len(amin) - 1, out=lut)
+        cols["row_idx"] = lut
     return tables
 
-# 2) Call the function once (cached) so we can reuse it
-norms = load_normative_tables()
+# 2) Bind the tables into session state once so later reruns pay a plain
+#    dict lookup instead of going back through the cache machinery
+if "norms" not in st.session_state:
+    st.session_state.norms = load_normative_tables()
+norms = st.session_state.norms
 
 # --- UI: select organ, enter age & measurement, then compute z-score ---
 
-st.title("Pediatric Organ Size Calculator")
+# Static page header: button-centering CSS + title in one markdown payload,
+# built once at import instead of concatenated per rerun
+_STATIC_HEADER = """
+<style>
+div.stButton > button {
+    margin: auto;
+    display: block;
+}
+</style>
 
-# — Center all buttons below images —
-st.markdown(
-    """
-    <style>
-    div.stButton > button {
-        margin: auto;
-        display: block;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+# Pediatric Organ Size Calculator
+"""
+
+st.markdown(_STATIC_HEADER, unsafe_allow_html=True)
 
 # --- Organ selector via images + button below (reordered & relabeled) ---
 # Ensure a default organ is selected
@@ -45,38 +73,56 @@ if "selected_organ" not in st.session_state:
 def select_organ(name):
     st.session_state.selected_organ = name
 
-# 1) Define the exact order and display labels you want:
-ordered_organs = [
+# 1) Define the exact order and display labels you want (tuple and
+#    read-only mapping: true constants, never rebuilt or mutated)
+ordered_organs = (
     "right_lobe_liver_length",
     "spleen_length",
     "right_kidney_length",
     "left_kidney_length"
-]
-display_names = {
+)
+display_names = types.MappingProxyType({
     "right_kidney_length": "Right Kidney",
     "left_kidney_length": "Left Kidney",
     "right_lobe_liver_length": "Liver",
     "spleen_length": "Spleen"
-}
+})
+# Pre-render the "Selected organ" line per organ: a dict lookup per rerun
+# instead of re-formatting the f-string
+_SELECTED_MSG = {k: f"**Selected organ:** {v}" for k, v in display_names.items()}
 
 st.write("## Select an organ:")
 image_dir = os.path.join(os.path.dirname(__file__), "images")
+
+# Pre-render each organ PNG as a base64 <img> tag once per session; reruns
+# skip PIL decoding and image-delta serialization, and the browser reuses
+# its own cache for the data URI
+@st.cache_resource
+def load_organ_images():
+    images = {}
+    for key in ordered_organs:
+        img_path = os.path.join(image_dir, f"{key}.png")
+        if os.path.exists(img_path):
+            with open(img_path, "rb") as f:
+                b64 = base64.b64encode(f.read()).decode()
+            images[key] = f'<img style="width:100%" src="data:image/png;base64,{b64}">'
+    return images
+
+organ_images = load_organ_images()
 cols = st.columns(len(ordered_organs))
 
 # 2) Loop through your ordered list instead of norms.keys()
 for idx, key in enumerate(ordered_organs):
     with cols[idx]:
-        img_path = os.path.join(image_dir, f"{key}.png")
-        if os.path.exists(img_path):
-            img = Image.open(img_path)
-            st.image(img, use_container_width=True)
+        if key in organ_images:
+            st.markdown(organ_images[key], unsafe_allow_html=True)
         # Use your short label under each image
         if st.button(display_names[key], key=f"btn_{key}"):
             select_organ(key)
 
 # 3) Show the chosen organ with its clean label
 organ_key = st.session_state.selected_organ
-st.write(f"**Selected organ:** {display_names[organ_key]}")
+st.write(_SELECTED_MSG[organ_key])
 
 # --- Optional: Patient sex ---
 sex = st.selectbox(
@@ -101,64 +147,44 @@ with st.expander("Optional: Body Surface Area (BSA)", expanded=False):
         weight_unit = st.radio("Weight unit:", ("kg", "g"), horizontal=True)
 
     # convert to cm/kg
-    if height_unit == "m":
-        height_cm = height_val * 100
-    else:
-        height_cm = height_val
-
-    if weight_unit == "g":
-        weight_kg = weight_val / 1000
-    else:
-        weight_kg = weight_val
+    height_cm = height_val * _H_SCALE[height_unit]
+    weight_kg = weight_val * _W_SCALE[weight_unit]
 
     # compute & display BSA
     if height_cm > 0 and weight_kg > 0:
-        bsa = np.sqrt((height_cm * weight_kg) / 3600)
+        bsa = sqrt(height_cm * weight_kg / 3600)
         st.write(f"**Body Surface Area:** {bsa:.2f} m²")
 
-# 2) Age input
-age_input = st.text_input(
-    "Enter patient age (e.g. 2y3m or 27m or 1.5y):",
-    value=""
-)
+# 2+3) Age and measurement inputs, batched in a form so editing a field
+#      doesn't rerun the whole script — only submitting does
+with st.form("z_form"):
+    age_input = st.text_input(
+        "Enter patient age (e.g. 2y3m or 27m or 1.5y):",
+        value=""
+    )
+    measurement_value = st.number_input(
+        "Enter dimension value:",
+        min_value=0.0,
+        step=0.1
+    )
+    unit = st.radio("Unit:", ("cm", "mm"))
+    compute_clicked = st.form_submit_button("Compute Z-Score")
 
-# 3) Measurement input
-measurement_value = st.number_input(
-    "Enter dimension value:",
-    min_value=0.0,
-    step=0.1
+# 5) Helper: parse age string into a single number of months
+#    Precompiled once at import so each click is a single regex match,
+#    e.g. "2y3m", "1.5y", "27m" — a bare number means months.
+_AGE_RE = re.compile(
+    r"^\s*(?:(\d+(?:\.\d+)?)\s*y)?\s*(?:(\d+(?:\.\d+)?)\s*m)?\s*$", re.I
 )
-unit = st.radio("Unit:", ("cm", "mm"))
-
-# 4) Helper: convert any cm→mm
-def to_mm(val, unit):
-    return val * 10 if unit == "cm" else val
+_BARE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*$")
 
-# 5) Helper: parse age string into a single number of months
 def parse_age_to_months(s):
-    s = s.strip().lower()
-    years = 0.0
-    months = 0.0
-    if "y" in s:
-        parts = s.split("y", 1)
-        try:
-            years = float(parts[0])
-        except:
-            years = 0.0
-        s = parts[1]
-    if "m" in s:
-        parts = s.split("m", 1)
-        try:
-            months = float(parts[0])
-        except:
-            months = 0.0
-    # if no “y” or “m”, assume the whole is months
-    if years == 0 and months == 0:
-        try:
-            months = float(s)
-        except:
-            months = 0.0
-    return years * 12 + months
+    m = _AGE_RE.match(s)
+    if m and (m.group(1) or m.group(2)):
+        return float(m.group(1) or 0) * 12 + float(m.group(2) or 0)
+    # no "y" or "m" suffix: assume the whole thing is months
+    m = _BARE_RE.match(s)
+    return float(m.group(1)) if m else 0.0
 
 def format_age_range(min_mo, max_mo):
     """
@@ -174,37 +200,40 @@ def format_age_range(min_mo, max_mo):
     else:
         return f"{int(min_mo)}–{int(max_mo)} mo"
 
-# 6) When user clicks, do the calculation
+# 6) When user submits the form, do the calculation
 # --- Compute Z-Score block ---
-if st.button("Compute Z-Score"):
+if compute_clicked:
     # 1) Parse inputs
     age_months = parse_age_to_months(age_input)
-    meas_mm    = to_mm(measurement_value, unit)
+    meas_mm    = measurement_value * _TO_MM[unit]
     key        = organ_key
     table      = norms[key]
+    amin       = table["age_min_months"]
+    amax       = table["age_max_months"]
 
-    # 2) Find matching row or fallback
-    match = table[
-        (table.age_min_months <= age_months) &
-        (age_months <= table.age_max_months)
-    ]
-    if match.empty:
-        row = table.iloc[0] if age_months < table.age_min_months.min() else table.iloc[-1]
+    # 2) Find matching row or fallback: one integer index into the
+    #    precomputed month → row LUT
+    i = int(table["row_idx"][min(int(age_months), _LUT_MAX_MONTHS)])
+    if not (amin[i] <= age_months <= amax[i]):
         st.warning(
             f"Age ({age_input}) out of range. Using data for "
-            f"{format_age_range(row.age_min_months, row.age_max_months)}."
+            f"{format_age_range(amin[i], amax[i])}."
         )
-    else:
-        row = match.iloc[0]
+
+    # Unpack the row as plain Python floats in one go
+    mean_mm, sd_mm, lower, upper, row_amin, row_amax = (
+        float(table[col][i])
+        for col in (
+            "mean_mm", "sd_mm", "lower_mm", "upper_mm",
+            "age_min_months", "age_max_months",
+        )
+    )
 
     # 3) Compute and show z-score
-    z = (meas_mm - row.mean_mm) / row.sd_mm
+    z = (meas_mm - mean_mm) / sd_mm
     st.write(f"**Z-score:** {z:.2f}")
 
     # 4) Verdict based on suggested limits
-    lower = row.lower_mm
-    upper = row.upper_mm
-
     if meas_mm < lower:
         verdict = "Too small"
     elif meas_mm > upper:
@@ -214,18 +243,14 @@ if st.button("Compute Z-Score"):
 
     st.write(f"**Interpretation:** {verdict}")
 
-    # 5) (Optional) Show reference stats and limits in chosen unit
-    age_label = format_age_range(row.age_min_months, row.age_max_months)
-    if unit == "cm":
-        mean_disp  = row.mean_mm / 10
-        sd_disp    = row.sd_mm   / 10
-        lower_disp = lower       / 10
-        upper_disp = upper       / 10
-    else:
-        mean_disp  = row.mean_mm
-        sd_disp    = row.sd_mm
-        lower_disp = lower
-        upper_disp = upper
+    # 5) (Optional) Show reference stats and limits in chosen unit:
+    #    one mm→display scale factor instead of four branchy divisions
+    age_label = format_age_range(row_amin, row_amax)
+    scale = 0.1 if unit == "cm" else 1.0
+    mean_disp  = mean_mm * scale
+    sd_disp    = sd_mm   * scale
+    lower_disp = lower   * scale
+    upper_disp = upper   * scale
 
     # display reference stats
     st.write(
@@ -0,0 +1,33 @@
+# build_norms.py
+# One-time offline script: read every organ CSV in data/ and bundle the
+# columns into a single binary data/norms.npz so the app can skip CSV
+# parsing on cold start. Rerun this whenever a CSV changes.
+import csv
+import glob, os
+import numpy as np
+
+COLUMNS = (
+    "age_min_months", "age_max_months",
+    "mean_mm", "sd_mm", "lower_mm", "upper_mm",
+)
+
+
+def main():
+    data_dir = os.path.join(os.path.dirname(__file__), "data")
+    arrays = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.csv"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        for col in COLUMNS:
+            # e.g. "right_kidney_length__mean_mm" → one float32 column array
+            arrays[f"{name}__{col}"] = np.array(
+                [float(r[col]) for r in rows], dtype=np.float32
+            )
+    out_path = os.path.join(data_dir, "norms.npz")
+    np.savez(out_path, **arrays)
+    print(f"Wrote {out_path} ({len(arrays)} arrays)")
+
+
+if __name__ == "__main__":
+    main()